@@ -0,0 +1,128 @@
+"""배터리별 RUL 파생 변수 계산 + 캐시 (feature store).
+
+battery_id, Cycle 순으로 정렬한 프레임에서 배터리 단위로 한 번에(벡터 연산) 계산한다.
+    - {col}_diff        : 직전 싸이클 대비 변화량
+    - {col}_roll_mean   : 최근 N 싸이클 평균
+    - {col}_roll_slope  : 최근 N 싸이클 기울기 (Cycle 에 대한 최소제곱 기울기)
+    - Rct_growth        : 첫 싸이클 대비 Rct 누적 증가량 (Rct_growth_pct 는 비율)
+
+계산 결과는 원본 파일 해시로 이름 붙인 Parquet 파일에 저장해서,
+같은 파일이면 다시 계산하지 않고 바로 읽어온다.
+"""
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from rul_predictor import DATA_PATH
+
+FEATURE_DIR = "feature_cache"
+FEATURE_VERSION = 2  # 계산 방식이 바뀌면 올려서 기존 캐시를 무효화
+DEFAULT_WINDOW = 5
+
+# 학습 타깃은 원본 라벨만 두고 파생 변수는 만들지 않음 (원본 파일의 RUL_diff 도 버림)
+TARGET_COLUMN = "RUL"
+
+# 파생 변수를 만들 원본 컬럼 (파일에 있는 것만 사용)
+BASE_COLUMNS = [
+    "SOH", "Rct", "Capacity",
+    "charge_time", "discharge_time",
+    "max_temp_c", "max_temp_d",
+]
+
+
+def _group_bounds(battery_ids):
+    """정렬된 battery_id 배열에서 각 행이 속한 그룹의 시작 위치."""
+    n = len(battery_ids)
+    is_start = np.ones(n, dtype=bool)
+    is_start[1:] = battery_ids[1:] != battery_ids[:-1]
+    start_pos = np.flatnonzero(is_start)
+    group_no = np.cumsum(is_start) - 1
+    return start_pos[group_no]
+
+
+def _window_sum(values, start, window):
+    """그룹을 넘지 않는 최근 window 행의 합 (NaN 은 0 으로).
+
+    행 단위 루프 대신 window 크기만큼 배열을 밀어서 더한다.
+    """
+    values = np.nan_to_num(values)
+    idx = np.arange(len(values))
+    total = values.copy()
+    for k in range(1, window):
+        shifted = np.zeros_like(values)
+        shifted[k:] = values[:-k]
+        total += np.where(idx - k >= start, shifted, 0.0)
+    return total
+
+
+def compute_features(df, window=DEFAULT_WINDOW):
+    """battery_id/Cycle 기준으로 정렬하고 배터리별 파생 변수를 추가한 프레임을 반환."""
+    df = df.sort_values(["battery_id", "Cycle"], kind="mergesort").reset_index(drop=True)
+    columns = [c for c in BASE_COLUMNS if c in df.columns]
+    grouped = df.groupby("battery_id", sort=False)
+
+    battery_ids = df["battery_id"].to_numpy()
+    start = _group_bounds(battery_ids)
+    cycle = df["Cycle"].to_numpy(dtype=np.float64)
+
+    new_cols = {}
+    for col in columns:
+        y = df[col].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(y)
+        x = np.where(valid, cycle, 0.0)
+
+        n = _window_sum(valid.astype(np.float64), start, window)
+        sum_y = _window_sum(y, start, window)
+        sum_x = _window_sum(x, start, window)
+        sum_xy = _window_sum(x * np.nan_to_num(y), start, window)
+        sum_xx = _window_sum(x * x, start, window)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, sum_y / n, np.nan)
+            denom = n * sum_xx - sum_x ** 2
+            slope = np.where((n >= 2) & (denom > 0), (n * sum_xy - sum_x * sum_y) / denom, np.nan)
+
+        new_cols[f"{col}_diff"] = grouped[col].diff().to_numpy()
+        new_cols[f"{col}_roll_mean"] = mean
+        new_cols[f"{col}_roll_slope"] = slope
+
+    if "Rct" in df.columns:
+        rct_first = grouped["Rct"].transform("first").to_numpy(dtype=np.float64)
+        rct = df["Rct"].to_numpy(dtype=np.float64)
+        new_cols["Rct_growth"] = rct - rct_first
+        with np.errstate(invalid="ignore", divide="ignore"):
+            new_cols["Rct_growth_pct"] = np.where(rct_first != 0, rct / rct_first - 1, np.nan)
+
+    # 원본 파일의 *_diff 컬럼은 다시 계산한 값으로 대체하고, 타깃에서 나온 컬럼은 입력 옆에 남기지 않음
+    df = df.drop(columns=[c for c in df.columns if c in new_cols or c.startswith(f"{TARGET_COLUMN}_")])
+    return pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
+
+
+def source_hash(data_path, window=DEFAULT_WINDOW):
+    h = hashlib.sha256()
+    with open(data_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    h.update(f"window={window};version={FEATURE_VERSION}".encode())
+    return h.hexdigest()
+
+
+def feature_path(data_path, window=DEFAULT_WINDOW, feature_dir=FEATURE_DIR):
+    stem = os.path.splitext(os.path.basename(data_path))[0]
+    return os.path.join(feature_dir, f"{stem}-{source_hash(data_path, window)[:16]}.parquet")
+
+
+def load_features(data_path=DATA_PATH, window=DEFAULT_WINDOW, feature_dir=FEATURE_DIR):
+    """캐시된 파생 변수 프레임을 읽고, 없으면 계산해서 Parquet 으로 저장."""
+    path = feature_path(data_path, window, feature_dir)
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+
+    features = compute_features(pd.read_csv(data_path), window)
+    os.makedirs(feature_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    features.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return features
@@ -0,0 +1,144 @@
+"""여러 CSV / zip 파일을 한 번에 읽어서 하나의 fleet 프레임으로 합치기.
+
+    - 파일마다 pyarrow CSV 리더로 읽고 (GIL 을 풀어서) 스레드 풀에서 동시에 처리
+    - 컬럼 이름 변형을 통일 (예: discharge_voltage / discharge_voltage(V) -> discharge_voltage(V))
+    - Arrow 테이블을 한 번에 이어 붙인 뒤 pandas 로 한 번만 변환
+    - 같은 (battery_id, Cycle) 행은 하나로 합침 (컬럼마다 나중에 읽은 파일 값 우선)
+"""
+import io
+import os
+import re
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# 단위/대소문자를 뺀 이름 -> 대시보드에서 쓰는 이름
+CANONICAL_COLUMNS = {
+    "battery_id": "battery_id",
+    "cycle": "Cycle",
+    "soh": "SOH",
+    "rul": "RUL",
+    "rct": "Rct",
+    "capacity": "Capacity",
+    "ambient_temperature": "ambient_temperature",
+    "charge_current": "charge_current(A)",
+    "discharge_current": "discharge_current(A)",
+    "discharge_voltage": "discharge_voltage(V)",
+    "discharge_capacity": "discharge capacity",
+    "charge_capacity": "charge capacity",
+    "coulombic_efficiency": "Coulombic efficiency",
+}
+KEY_COLUMNS = ["battery_id", "Cycle"]
+
+
+def _normalize(name):
+    name = re.sub(r"\([^)]*\)", "", name)  # 단위 표기 제거: discharge_voltage(V) -> discharge_voltage
+    return re.sub(r"[\s\-]+", "_", name.strip()).lower()
+
+
+def canonical_name(name):
+    return CANONICAL_COLUMNS.get(_normalize(name), name.strip())
+
+
+def _read_zip_member(data, member):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return zf.read(member)
+
+
+def _iter_sources(sources):
+    """업로드 파일 / 경로 / zip 을 (이름, 읽을 대상) 목록으로 펼침.
+
+    zip 안의 파일은 압축 해제도 스레드 풀에서 하도록 (zip bytes, 파일 이름) 으로 넘김.
+    """
+    for src in sources:
+        name = getattr(src, "name", src if isinstance(src, str) else "uploaded.csv")
+        if name.lower().endswith(".zip"):
+            if hasattr(src, "getvalue"):
+                data = src.getvalue()
+            else:
+                with open(src, "rb") as f:
+                    data = f.read()
+            try:
+                with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                    members = [m for m in zf.namelist()
+                               if m.lower().endswith(".csv") and not os.path.basename(m).startswith(".")]
+            except zipfile.BadZipFile as e:
+                raise ValueError(f"'{name}' 파일은 올바른 zip 파일이 아닙니다: {e}") from e
+            for member in members:
+                yield f"{name}/{member}", (data, member)
+        elif isinstance(src, str):
+            yield name, src
+        else:
+            yield name, src.getvalue() if hasattr(src, "getvalue") else src.read()
+
+
+def read_table(source):
+    """CSV 하나를 Arrow 테이블로 읽고 컬럼 이름을 통일."""
+    if isinstance(source, tuple):
+        source = _read_zip_member(*source)
+    if isinstance(source, (bytes, bytearray)):
+        source = pa.BufferReader(source)
+    # 파일 단위로 스레드 풀에서 병렬 처리하므로 파일 하나는 스레드 1개로 읽음
+    table = pacsv.read_csv(source, read_options=pacsv.ReadOptions(use_threads=False))
+
+    keep, names = [], []
+    for i, name in enumerate(table.column_names):
+        # 빈 헤더 (29_32plus.csv 끝의 ",,,,") 와 예전에 저장된 pandas 인덱스 컬럼은 버림
+        if not name.strip() or name.startswith("Unnamed:"):
+            continue
+        canonical = canonical_name(name)
+        if canonical in names:
+            continue
+        keep.append(i)
+        names.append(canonical)
+    table = table.select(keep).rename_columns(names)
+
+    if "battery_id" in names:
+        table = table.set_column(names.index("battery_id"), "battery_id", table["battery_id"].cast(pa.string()))
+    return table
+
+
+def _read_item(item):
+    name, source = item
+    try:
+        return read_table(source)
+    except (zipfile.BadZipFile, zlib.error) as e:  # zip 안 파일이 깨진 경우 (CRC / 압축 오류)
+        raise ValueError(f"'{name}' 파일을 zip 에서 읽을 수 없습니다: {e}") from e
+
+
+def ingest_files(sources, max_workers=None):
+    """여러 CSV / zip 을 읽어서 하나의 DataFrame 과 요약 정보를 반환."""
+    items = list(_iter_sources(sources))
+    if not items:
+        raise ValueError("읽을 CSV 파일이 없습니다.")
+
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        tables = list(pool.map(_read_item, items))
+
+    for (name, _), table in zip(items, tables):
+        missing = [c for c in KEY_COLUMNS if c not in table.column_names]
+        if missing:
+            raise ValueError(f"'{name}' 파일에 {missing} 컬럼이 없습니다.")
+
+    # 파일마다 컬럼 구성이 다를 수 있으므로 없는 컬럼은 null 로 채우고 타입은 넓은 쪽으로 맞춤
+    try:
+        df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = pd.concat([t.to_pandas() for t in tables], ignore_index=True)
+
+    # 중복 (battery_id, Cycle) 은 컬럼마다 나중 파일의 값(비어 있으면 앞 파일 값)으로 합침
+    rows_read = len(df)
+    df = df.groupby(KEY_COLUMNS, sort=True, dropna=False).last().reset_index()
+
+    info = {
+        "files": len(items),
+        "rows_read": rows_read,
+        "duplicates": rows_read - len(df),
+        "batteries": int(df["battery_id"].nunique()),
+    }
+    return df, info
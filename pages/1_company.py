@@ -4,18 +4,89 @@ import pandas as pd
 import statsmodels.api as sm
 import matplotlib.pyplot as plt
 import itertools
+import os
 import re
+from uncertainty import MAX_CYCLE, fleet_eol_intervals
+from tiles import TilePyramid
+from report_export import DEFAULT_DAILY_USAGE, frame_hash, report_key, submit_report
+from ingest import ingest_files
+
+
+# EOL 불확실성 구간은 같은 데이터면 다시 계산하지 않도록 캐시
+@st.cache_data
+def load_eol_intervals(df):
+    return fleet_eol_intervals(df[[c for c in ("battery_id", "Cycle", "SOH") if c in df.columns]])
+
+
+# 여러 CSV / zip 파일을 합친 fleet 데이터는 업로드 파일 구성이 같으면 다시 읽지 않음
+@st.cache_resource(max_entries=4)
+def load_fleet_files(file_ids, _files):
+    return ingest_files(_files)
+
+
+# 리포트 캐시 키에 쓰는 데이터 해시는 업로드 파일 구성마다 한 번만 계산 (리런마다 전체 프레임을 해시하지 않음)
+@st.cache_data(max_entries=4)
+def fleet_data_hash(file_ids, _df):
+    return frame_hash(_df)
+
+
+# 모니터링 (2) 파일과 X축별 집계 타일은 업로드한 파일마다 한 번만 만듦
+@st.cache_resource(max_entries=4)
+def load_monitoring_file(file_id, _file):
+    return pd.read_csv(_file)
+
+
+@st.cache_resource(max_entries=4)
+def load_tile_pyramid(file_id, x_axis, _df):
+    return TilePyramid(_df, x_axis)
+
+# 리포트 작업 진행 상황은 페이지 전체가 아니라 이 부분만 1초마다 다시 그림
+@st.fragment(run_every=1.0)
+def show_report_progress():
+    job = st.session_state.get("report_job")
+    if job is None:
+        return
+    if job.done:
+        st.rerun()
+    st.progress(job.progress, text=job.message)
+
+
+def show_report_downloads(job):
+    if job.error is not None:
+        st.error(job.message)
+        return
+    st.success("✅ 리포트 준비 완료!")
+    col_d1, col_d2, col_d3 = st.columns(3)
+    downloads = [
+        (col_d1, "pdf", "📄 PDF 다운로드", "application/pdf"),
+        (col_d2, "csv", "📑 CSV 다운로드", "text/csv"),
+        (col_d3, "parquet", "🗂️ Parquet 다운로드", "application/octet-stream"),
+    ]
+    for col, kind, label, mime in downloads:
+        with col:
+            with open(job.paths[kind], "rb") as f:
+                st.download_button(label, f.read(), file_name=os.path.basename(job.paths[kind]),
+                                   mime=mime, key=f"report_download_{kind}")
 
 # 페이지 기본 설정
 
 st.markdown("<h2 style='text-align: center;'>✨ Chill & NASA Battery 성능 분석 ✨</h2>", unsafe_allow_html=True)
 
 # 파일 업로드 기능
-uploaded_file = st.file_uploader("📂 CSV 파일을 업로드하세요", type=["csv"])
-
-if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
+uploaded_files = st.file_uploader("📂 CSV 파일을 업로드하세요 (여러 개 / zip 가능)", type=["csv", "zip"], accept_multiple_files=True)
+
+if uploaded_files:
+    try:
+        file_ids = tuple(f.file_id for f in uploaded_files)
+        fleet_df, ingest_info = load_fleet_files(file_ids, uploaded_files)
+    except ValueError as e:
+        st.error(f"🚨 {e}")
+        st.stop()
+    # 아래에서 EOL 컬럼 등을 추가하므로 캐시된 프레임은 복사해서 사용
+    df = fleet_df.copy()
     st.success("✅ 파일 업로드 완료!")
+    st.caption(f"📁 파일 {ingest_info['files']}개 · 배터리 {ingest_info['batteries']}개 · "
+               f"{ingest_info['rows_read']:,}행 중 중복 (battery_id, Cycle) {ingest_info['duplicates']:,}행 병합")
 
 
     # EOL 컬럼 체크 및 계산
@@ -63,6 +134,9 @@ if uploaded_file is not None:
     # 빈 컬럼 다시 제거
     df = df.dropna(axis=1, how='all')
 
+    # 예측 EOL 의 Monte-Carlo 구간 (10% / 50% / 90%)
+    eol_intervals = load_eol_intervals(df)
+
     # 데이터 비교 표시
     col1, col2 = st.columns(2)
 
@@ -75,6 +149,32 @@ if uploaded_file is not None:
         st.dataframe(df.head())
 
 
+    # **Fleet 리포트 내보내기** (백그라운드에서 만들고 완료되면 다운로드)
+    st.subheader("📥 Fleet 리포트 내보내기")
+    col_r1, col_r2 = st.columns([3, 1])
+    with col_r1:
+        report_daily_usage = st.number_input("⏳ 하루 평균 사용 시간 (초)", min_value=1, value=DEFAULT_DAILY_USAGE, step=1, key="report_daily_usage")
+    with col_r2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("📦 리포트 만들기", key="report_build"):
+            st.session_state.report_job = submit_report(df, eol_intervals, report_daily_usage,
+                                                        data_hash=fleet_data_hash(file_ids, fleet_df))
+
+    # 다른 파일 / 사용 시간 / 모델로 만든 이전 리포트나 캐시에서 지워진 리포트는 보여주지 않음
+    report_job = st.session_state.get("report_job")
+    if report_job is not None and (
+        report_job.key != report_key(df, report_daily_usage, data_hash=fleet_data_hash(file_ids, fleet_df))
+        or (report_job.done and report_job.error is None and not report_job.is_cached())
+    ):
+        del st.session_state["report_job"]
+        report_job = None
+    if report_job is not None:
+        if report_job.done:
+            show_report_downloads(report_job)
+        else:
+            show_report_progress()
+
+
     # **배터리 성능 지표 & 시험 조건**
     col1, col2 = st.columns(2, gap="medium")
 
@@ -86,11 +186,17 @@ if uploaded_file is not None:
         if not battery_1cycle_data_1.empty:
             eol_value = battery_1cycle_data_1["EOL"].values[0]
             rct_mean_value = battery_1cycle_data_1["Rct_mean"].values[0]
+            band = eol_intervals[eol_intervals["battery_id"] == selected_battery_1]
+            eol_band = ""
+            if not band.empty:
+                p10, p90 = band["EOL_p10"].values[0], band["EOL_p90"].values[0]
+                p90_text = f"{MAX_CYCLE} 이후" if np.isinf(p90) else f"{p90:.0f}"
+                eol_band = f" <span style='color:gray;'>(80% 구간: {p10:.0f} ~ {p90_text})</span>"
 
             st.markdown(
                 f"""
                 <div style="background-color:#E8F5E9; padding:15px; border-radius:10px; margin-bottom:20px;">
-                    <b>EOL:</b> {eol_value} cycle
+                    <b>EOL:</b> {eol_value} cycle{eol_band}
                 </div>
                 <div style="background-color:#E8F5E9; padding:15px; border-radius:10px; margin-bottom:20px;">
                     <b>Rct Median:</b> {rct_mean_value}Ω
@@ -136,8 +242,15 @@ if uploaded_file is not None:
 
         if not eol_data.empty:
             eol_data["EOL"] = eol_data["EOL"].astype(str).apply(lambda x: int(re.search(r'\d+', x).group()) if re.search(r'\d+', x) else 0)
+            # 예측 EOL 에는 10%~90% 구간을 에러바로 표시 (100 싸이클 안에 안 넘는 경로가 많으면 100 까지)
+            eol_data = eol_data.merge(eol_intervals, on="battery_id", how="left")
+            has_band = eol_data["EOL_p10"].notna() & (eol_data["EOL"] > 0)
+            lower = np.where(has_band, (eol_data["EOL"] - eol_data["EOL_p10"]).clip(lower=0), 0)
+            upper = np.where(has_band, (eol_data["EOL_p90"].clip(upper=MAX_CYCLE) - eol_data["EOL"]).clip(lower=0), 0)
+
             fig, ax = plt.subplots(figsize=(6, 4))
-            bars = ax.bar(eol_data["battery_id"].astype(str), eol_data["EOL"], color="lightgreen")
+            bars = ax.bar(eol_data["battery_id"].astype(str), eol_data["EOL"], color="lightgreen",
+                          yerr=[lower, upper], capsize=4, ecolor="gray")
             
             for bar in bars:
                 height = bar.get_height()
@@ -257,7 +370,7 @@ if uploaded_file is not None:
         file_2 = st.file_uploader("📂 CSV 파일을 업로드하세요 (유연한 분석)", type=["csv"], key="file2")
         
         if file_2:
-            df2 = pd.read_csv(file_2)
+            df2 = load_monitoring_file(file_2.file_id, file_2)
             st.success("✅ 파일 업로드 완료!")
             
             # 필터링 요소를 한 줄에 배치, 독립적인 키 사용
@@ -271,10 +384,32 @@ if uploaded_file is not None:
                 y_axis = st.selectbox("Y축 설정", df2.columns, key="y_axis_independent")
             
             if selected_battery_2 and x_axis and y_axis:
-                plot_data = df2[df2["battery_id"] == selected_battery_2]
-                
+                numeric_columns = df2.select_dtypes(include="number").columns
                 fig, ax = plt.subplots()
-                ax.plot(plot_data[x_axis], plot_data[y_axis], marker='o', linestyle='-')
+
+                if x_axis in numeric_columns and y_axis in numeric_columns and x_axis != y_axis:
+                    pyramid = load_tile_pyramid(file_2.file_id, x_axis, df2)
+                    x_range = pyramid.x_range(selected_battery_2)
+
+                    if x_range is not None and x_range[0] < x_range[1]:
+                        visible = st.slider("🔎 X축 범위", min_value=x_range[0], max_value=x_range[1],
+                                            value=x_range, key=f"x_range_{selected_battery_2}_{x_axis}")
+                    else:
+                        visible = (None, None)
+
+                    # 보이는 범위에 맞는 해상도의 타일만 그림 (최대 확대 시 원본 데이터)
+                    tile = pyramid.query(selected_battery_2, y_axis, *visible)
+                    if tile["level"] == 0:
+                        ax.plot(tile["x"], tile["y_mean"], marker='o', linestyle='-')
+                    else:
+                        ax.fill_between(tile["x"], tile["y_min"], tile["y_max"], alpha=0.3, label="min ~ max")
+                        ax.plot(tile["x"], tile["y_mean"], linestyle='-', label="mean")
+                        ax.legend()
+                        st.caption(f"📦 집계 레벨 {tile['level']} (버킷당 {tile['rows_per_bucket']}행) - 범위를 좁히면 원본 데이터가 표시됩니다.")
+                else:
+                    plot_data = df2[df2["battery_id"] == selected_battery_2]
+                    ax.plot(plot_data[x_axis], plot_data[y_axis], marker='o', linestyle='-')
+
                 ax.set_xlabel(x_axis)
                 ax.set_ylabel(y_axis)
                 ax.set_title(f"{selected_battery_2} - {x_axis} vs. {y_axis}")
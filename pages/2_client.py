@@ -1,24 +1,36 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from xgboost import XGBRegressor
-from sklearn.model_selection import train_test_split
 import datetime
-# 예시 데이터 로드
-df_filtered = pd.read_csv("Merged_Dataset_re (1).csv")
-
-df_filtered = df_filtered.dropna(subset=['ambient_temperature', 'discharge_voltage', 'Rct', 'SOH', 'RUL'])
-
-# 독립 변수(X)와 타겟 변수(y) 설정
-X = df_filtered[['ambient_temperature', 'discharge_voltage', 'Rct', 'SOH']]
-y = df_filtered['RUL']
-
-# 훈련 데이터와 테스트 데이터 분할
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# XGBoost 모델 정의 및 학습
-model = XGBRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+import time
+from rul_predictor import FastRULPredictor, load_metrics, load_model, replacement_estimate
+from rul_server import RULClient, DEFAULT_HOST, DEFAULT_PORT
+from uncertainty import rul_quantiles
+
+# 예측 방식 선택 (로컬 모델 / 로컬 추론 서버)
+predict_mode = st.sidebar.radio("🧠 예측 방식", ["로컬 모델", "추론 서버"], key="predict_mode")
+
+# 로컬 모델은 train_rul.py 로 학습해 둔 모델을 한 번만 불러와서 공유 (대시보드에서는 학습하지 않음)
+@st.cache_resource
+def load_local_predictor():
+    # 빠른 예측기 (DataFrame/DMatrix 변환 없이 float32 입력으로 바로 예측)
+    return FastRULPredictor(load_model())
+
+metrics = load_metrics()
+
+if predict_mode == "추론 서버":
+    server_address = st.sidebar.text_input("🔌 서버 주소 (host:port 또는 unix:/경로)", value=f"{DEFAULT_HOST}:{DEFAULT_PORT}")
+    client = RULClient(server_address)
+    predictor = None
+else:
+    client = None
+    try:
+        predictor = load_local_predictor()
+    except FileNotFoundError as e:
+        st.error(f"🚨 {e}")
+        st.stop()
+    if metrics is not None:
+        st.sidebar.caption(f"📈 모델 CV RMSE (battery 단위 GroupKFold): {metrics['cv_rmse_mean']:.2f} ± {metrics['cv_rmse_std']:.2f}")
 
 # 스트림릿 인터페이스
 st.markdown("<h2 style='text-align: center;'>✨ Chill & NASA RUL 예측 서비스 ✨</h2>", unsafe_allow_html=True)
@@ -57,31 +69,46 @@ if st.button("🔄 싸이클 완료"):
     st.dataframe(st.session_state.df.drop(columns=["RUL"]))  
 
     if SOH <= 80 and not st.session_state.rul_predicted:
-        input_data = st.session_state.df.iloc[-1][['ambient_temperature', 'discharge_voltage', 'Rct', 'SOH']].values.reshape(1, -1)
-        st.session_state.predicted_rul = model.predict(input_data)[0]
+        features = [ambient_temperature, discharge_voltage, Rct, SOH]
+        if client is not None:
+            try:
+                st.session_state.predicted_rul = client.predict(features)["rul"]
+            except (OSError, ValueError) as e:
+                st.error(f"🚨 추론 서버 요청 실패: {e}")
+                st.stop()
+        else:
+            # 예측기는 세션끼리 공유하므로 지연 시간은 공유 속성 대신 이 호출만 직접 측정
+            start = time.perf_counter()
+            st.session_state.predicted_rul = predictor.predict_one(*features)
+            latency_ms = (time.perf_counter() - start) * 1000
         st.session_state.rul_predicted = True  
         
         st.markdown(f"<h3 style='color: red;'>🔮 예상 RUL: {st.session_state.predicted_rul:.2f} 회</h3>", unsafe_allow_html=True)
+        if metrics is not None and "residual_quantiles" in metrics:
+            band = rul_quantiles(st.session_state.predicted_rul, metrics["residual_quantiles"])
+            st.caption(f"📏 RUL 80% 구간: {float(band['0.1']):.2f} ~ {float(band['0.9']):.2f} 회")
+        if predictor is not None:
+            st.caption(f"⏱️ 예측 소요 시간: {latency_ms:.3f} ms")
         st.session_state.df.at[st.session_state.df.index[-1], 'RUL'] = st.session_state.predicted_rul
 
 # 하루 평균 사용 시간 입력 후 남은 사용 가능 일수 계산
 if st.session_state.predicted_rul is not None:
-    CYCLE_DURATION = 10496  
     st.markdown("<h4 style='font-size: 20px;'>⏳ 하루 평균 사용 시간 (초)</h4>", unsafe_allow_html=True)
     daily_usage = st.number_input("", min_value=1, value=36000, step=1)
 
     if daily_usage > 0:
-        remaining_days = (float(st.session_state.predicted_rul) * CYCLE_DURATION) / daily_usage
-        annual_replacements = 365 / remaining_days
-        BATTERY_PRICE = 5000
-        annual_cost = annual_replacements * BATTERY_PRICE
+        # 서버 모드에서도 이미 받은 RUL 로 계산 (서버와 같은 공식) - 사용 시간만 바뀌면 서버를 다시 부르지 않음
+        remaining_days, annual_cost = replacement_estimate(st.session_state.predicted_rul, daily_usage)
 
         st.subheader("📅 배터리 사용 예측")
         col5, col6 = st.columns(2)
         with col5:
             st.success(f"📆 남은 사용 가능 일수: **{remaining_days:.2f} 일**")
         with col6:
-            st.warning(f"💰 예상 연간 교체 비용: **{annual_cost:,.0f} 원**")
+            if np.isnan(annual_cost):
+                st.warning("💰 예상 RUL 이 0 이하입니다. 바로 교체가 필요합니다!")
+            else:
+                st.warning(f"💰 예상 연간 교체 비용: **{annual_cost:,.0f} 원**")
 
         expected_replacement_date = datetime.date.today() + datetime.timedelta(days=int(remaining_days))
         
@@ -0,0 +1,295 @@
+"""기업용 페이지 fleet 리포트 내보내기 (백그라운드 작업).
+
+배터리별 EOL / Rct_mean / 시험 조건 / EOL 구간 / 예측 RUL 과 교체 예정일 표를
+Parquet, CSV 로 저장하고, 표와 배터리별 SOH & Rct 그래프를 여러 페이지 PDF 로 만든다.
+그래프는 joblib 으로 여러 프로세스에서 동시에 그리고, 전체 작업은 별도 스레드에서
+돌아가므로 Streamlit 리런을 막지 않는다. 같은 입력이면 캐시된 결과 파일을 그대로 쓴다.
+"""
+import datetime
+import functools
+import hashlib
+import io
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from rul_predictor import RUL_FEATURES, FastRULPredictor, load_model, model_path, replacement_estimate
+
+REPORT_DIR = "report_cache"
+REPORT_VERSION = 1  # 리포트 형식이 바뀌면 올려서 기존 캐시를 무효화
+MAX_CACHED_REPORTS = 16  # report_cache/ 에 남겨 둘 리포트 수 (오래 안 쓴 것부터 지움)
+DEFAULT_DAILY_USAGE = 36000
+
+CONDITION_COLUMNS = ["ambient_temperature", "charge_current(A)", "discharge_current(A)", "discharge_voltage(V)"]
+PDF_COLUMNS = ["battery_id", "EOL", "EOL_p10", "EOL_p90", "Rct_mean", "RUL_pred",
+               "remaining_days", "replacement_date", "annual_cost"]
+PDF_ROWS_PER_PAGE = 25
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+# 📋 리포트 표 ------------------------------------------------------------
+def _model_features(rows):
+    """모델 입력 컬럼을 만듦 (업로드 파일은 discharge_voltage(V) 로 되어 있을 수 있음)."""
+    features = pd.DataFrame(index=rows.index)
+    for col in RUL_FEATURES:
+        if col in rows.columns:
+            features[col] = rows[col]
+        elif f"{col}(V)" in rows.columns:
+            features[col] = rows[f"{col}(V)"]
+        else:
+            features[col] = np.nan
+    return features.to_numpy(dtype=np.float32)
+
+
+def build_fleet_table(df, eol_intervals=None, daily_usage=DEFAULT_DAILY_USAGE, report_date=None, predictor=None):
+    """배터리당 한 행짜리 fleet 표를 만듦."""
+    report_date = report_date or datetime.date.today()
+    df = df.sort_values(["battery_id", "Cycle"], kind="mergesort")
+    first = df.drop_duplicates("battery_id", keep="first").set_index("battery_id")
+    last = df.drop_duplicates("battery_id", keep="last").set_index("battery_id")
+
+    table = pd.DataFrame(index=first.index)
+    for col in ["EOL", "Rct_mean"] + CONDITION_COLUMNS:
+        if col in first.columns:
+            table[col] = first[col]
+    table["EOL"] = table["EOL"].astype(str) if "EOL" in table.columns else "N/A"
+    table["last_cycle"] = last["Cycle"]
+    if "SOH" in last.columns:
+        table["last_SOH"] = last["SOH"]
+
+    if eol_intervals is not None and not eol_intervals.empty:
+        table = table.join(eol_intervals.set_index("battery_id"))
+
+    # 고객용 페이지와 같은 replacement_estimate 로 교체 예정일 계산
+    if predictor is None:
+        try:
+            predictor = FastRULPredictor(load_model())
+        except FileNotFoundError:
+            predictor = None
+    if predictor is not None:
+        rul = predictor.predict(_model_features(last)).astype(np.float64)
+        remaining_days, annual_cost = replacement_estimate(rul, daily_usage)
+        days = np.nan_to_num(remaining_days).astype(int)
+        table["RUL_pred"] = rul
+        table["remaining_days"] = remaining_days
+        table["annual_cost"] = annual_cost
+        table["replacement_date"] = [report_date + datetime.timedelta(days=int(d)) for d in days]
+    table["daily_usage"] = daily_usage
+    table["report_date"] = report_date
+    return table.reset_index()
+
+
+# 📉 그래프 --------------------------------------------------------------
+def render_battery_chart(battery, cycle, soh, rct, dpi=120):
+    """배터리 하나의 SOH & Rct 그래프를 PNG bytes 로 그림 (pyplot 을 쓰지 않아 프로세스/스레드에 안전)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(8, 4.5))
+    FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot()
+    ax2 = ax1.twinx()
+    if soh is not None and np.isfinite(soh).any():
+        ax1.plot(cycle, soh, linestyle="-", color="tab:blue", label="SOH")
+    if rct is not None and np.isfinite(rct).any():
+        ax2.plot(cycle, rct, linestyle="--", color="tab:red", label="Rct")
+    ax1.set_xlabel("Cycle")
+    ax1.set_ylabel("SOH")
+    ax2.set_ylabel("Rct")
+    ax1.set_title(f"{battery} SOH & Rct")
+    fig.legend(loc="upper right")
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi)
+    return buf.getvalue()
+
+
+def _chart_inputs(df):
+    for battery, battery_df in df.sort_values(["battery_id", "Cycle"], kind="mergesort").groupby("battery_id", sort=False):
+        soh = battery_df["SOH"].to_numpy(dtype=np.float64) if "SOH" in battery_df.columns else None
+        rct = battery_df["Rct"].to_numpy(dtype=np.float64) if "Rct" in battery_df.columns else None
+        yield battery, battery_df["Cycle"].to_numpy(), soh, rct
+
+
+def _write_pdf(path, table, charts):
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+    import matplotlib.image as mpimg
+
+    try:
+        import koreanize_matplotlib  # noqa: F401  EOL 의 "(예측)" 같은 한글 표시용
+    except ImportError:
+        pass
+
+    columns = [c for c in PDF_COLUMNS if c in table.columns]
+    shown = table[columns].copy()
+    for col in shown.columns:
+        if pd.api.types.is_float_dtype(shown[col]):
+            shown[col] = shown[col].map(lambda v: "" if pd.isna(v) else f"{v:,.2f}")
+    shown = shown.astype(str)
+
+    with PdfPages(path) as pdf:
+        for start in range(0, max(len(shown), 1), PDF_ROWS_PER_PAGE):
+            fig = Figure(figsize=(11.7, 8.3))
+            ax = fig.add_subplot()
+            ax.axis("off")
+            ax.set_title(f"Fleet EOL / RUL report ({table['report_date'].iloc[0] if len(table) else ''})")
+            chunk = shown.iloc[start:start + PDF_ROWS_PER_PAGE]
+            if not chunk.empty:
+                tbl = ax.table(cellText=chunk.values, colLabels=chunk.columns, loc="upper center")
+                tbl.auto_set_font_size(False)
+                tbl.set_fontsize(7)
+            pdf.savefig(fig)
+
+        for png in charts:
+            fig = Figure(figsize=(11.7, 8.3))
+            ax = fig.add_axes([0, 0, 1, 1])
+            ax.axis("off")
+            ax.imshow(mpimg.imread(io.BytesIO(png), format="png"))
+            pdf.savefig(fig)
+
+
+# 🧵 백그라운드 작업 ------------------------------------------------------
+@functools.lru_cache(maxsize=4)
+def _file_sha256(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _model_fingerprint():
+    """RUL 모델 파일 해시 (train_rul.py 로 다시 학습하면 리포트 캐시도 바뀌도록).
+
+    파일이 바뀌지 않았으면 (수정 시각 / 크기가 같으면) 다시 읽지 않음.
+    """
+    path = model_path()
+    if not os.path.exists(path):
+        return "no-model"
+    stat = os.stat(path)
+    return _file_sha256(path, stat.st_mtime_ns, stat.st_size)
+
+
+def frame_hash(df):
+    """입력 프레임 해시. 파일 크기에 비례해서 오래 걸리므로 업로드마다 한 번만 계산해서 넘기는 것이 좋음."""
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(",".join(map(str, df.columns)).encode())
+    return h.hexdigest()
+
+
+def report_key(df, daily_usage=DEFAULT_DAILY_USAGE, report_date=None, data_hash=None):
+    """입력 데이터 + 설정 + 모델이 같으면 같은 키 (캐시 재사용). data_hash 를 주면 df 는 다시 해시하지 않음."""
+    report_date = report_date or datetime.date.today()
+    h = hashlib.sha256()
+    h.update(_model_fingerprint().encode())
+    h.update((data_hash or frame_hash(df)).encode())
+    h.update(f"usage={daily_usage};date={report_date};version={REPORT_VERSION}".encode())
+    return h.hexdigest()[:16]
+
+
+def prune_reports(report_dir=REPORT_DIR, max_reports=MAX_CACHED_REPORTS):
+    """가장 최근에 쓴 max_reports 개만 남기고 나머지 리포트 폴더를 지움 (만드는 중인 .tmp 폴더는 제외)."""
+    if not os.path.isdir(report_dir):
+        return
+    dirs = [e for e in os.scandir(report_dir) if e.is_dir() and ".tmp-" not in e.name]
+    dirs.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in dirs[max_reports:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+class ReportJob:
+    """리포트 한 건을 만드는 백그라운드 작업. progress(0~1)/message/error/paths 로 상태를 확인."""
+
+    def __init__(self, key, df, eol_intervals, daily_usage, report_date, report_dir=REPORT_DIR, n_jobs=-1):
+        self.key = key
+        self.out_dir = os.path.join(report_dir, key)
+        self.paths = {
+            "csv": os.path.join(self.out_dir, "fleet_report.csv"),
+            "parquet": os.path.join(self.out_dir, "fleet_report.parquet"),
+            "pdf": os.path.join(self.out_dir, "fleet_report.pdf"),
+        }
+        self.progress = 0.0
+        self.message = "대기 중"
+        self.error = None
+        self._done = threading.Event()
+        self._args = (df, eol_intervals, daily_usage, report_date, n_jobs)
+        self._thread = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def is_cached(self):
+        return all(os.path.exists(p) for p in self.paths.values())
+
+    def start(self):
+        if self.is_cached():
+            os.utime(self.out_dir)  # 최근에 쓴 리포트로 표시 (prune_reports 에서 나중에 지워지도록)
+            self.progress, self.message = 1.0, "캐시된 리포트 사용"
+            self._done.set()
+            return self
+        self._thread = threading.Thread(target=self._run, name=f"report-{self.key}", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _run(self):
+        from joblib import Parallel, delayed
+
+        df, eol_intervals, daily_usage, report_date, n_jobs = self._args
+        try:
+            self.message = "📋 fleet 표 계산 중"
+            table = build_fleet_table(df, eol_intervals, daily_usage, report_date)
+            self.progress = 0.1
+
+            inputs = list(_chart_inputs(df))
+            charts = []
+            self.message = "📉 배터리별 그래프 그리는 중"
+            results = Parallel(n_jobs=n_jobs, return_as="generator")(
+                delayed(render_battery_chart)(*args) for args in inputs
+            )
+            for i, png in enumerate(results, start=1):
+                charts.append(png)
+                self.progress = 0.1 + 0.7 * i / max(len(inputs), 1)
+
+            # 다 만든 뒤 한 번에 옮겨서, 중간에 실패해도 반쯤 쓰인 캐시가 남지 않게 함
+            self.message = "📄 파일 저장 중"
+            tmp_dir = f"{self.out_dir}.tmp-{threading.get_ident()}"
+            os.makedirs(tmp_dir, exist_ok=True)
+            table.to_csv(os.path.join(tmp_dir, "fleet_report.csv"), index=False, encoding="utf-8-sig")
+            table.to_parquet(os.path.join(tmp_dir, "fleet_report.parquet"), index=False)
+            self.progress = 0.85
+            _write_pdf(os.path.join(tmp_dir, "fleet_report.pdf"), table, charts)
+            os.makedirs(os.path.dirname(self.out_dir) or ".", exist_ok=True)
+            if os.path.exists(self.out_dir):
+                shutil.rmtree(self.out_dir)
+            os.replace(tmp_dir, self.out_dir)
+            prune_reports(os.path.dirname(self.out_dir) or ".")
+            self.progress, self.message = 1.0, "✅ 완료"
+        except Exception as e:
+            self.error = e
+            self.message = f"🚨 실패: {e}"
+        finally:
+            with _jobs_lock:
+                _jobs.pop(self.key, None)
+            self._done.set()
+
+
+def submit_report(df, eol_intervals=None, daily_usage=DEFAULT_DAILY_USAGE, report_date=None,
+                  report_dir=REPORT_DIR, n_jobs=-1, data_hash=None):
+    """리포트 작업을 시작하고 ReportJob 을 반환. 같은 요청이 진행 중이면 그 작업을 같이 씀."""
+    report_date = report_date or datetime.date.today()
+    key = report_key(df, daily_usage, report_date, data_hash)
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is not None:
+            return job
+        job = ReportJob(key, df.copy(), eol_intervals, daily_usage, report_date, report_dir, n_jobs)
+        if not job.is_cached():
+            _jobs[key] = job
+    return job.start()
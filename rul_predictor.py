@@ -0,0 +1,185 @@
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+# RUL 모델 입력 순서 (pages/2_client.py 와 동일해야 함)
+RUL_FEATURES = ['ambient_temperature', 'discharge_voltage', 'Rct', 'SOH']
+
+DATA_PATH = "Merged_Dataset_re (1).csv"
+MODEL_DIR = "model"  # train_rul.py 가 학습 결과를 저장하는 폴더
+MODEL_FILE = "rul_model.json"
+METRICS_FILE = "metrics.json"
+CYCLE_DURATION = 10496  # 1 싸이클 소요 시간 (초)
+BATTERY_PRICE = 5000  # 배터리 1개 가격 (원)
+
+
+def model_path(model_dir=MODEL_DIR):
+    return os.path.join(model_dir, MODEL_FILE)
+
+
+def load_model(model_dir=MODEL_DIR):
+    """train_rul.py 로 학습해 둔 RUL 모델을 불러옴 (대시보드에서는 학습하지 않음)."""
+    from xgboost import XGBRegressor
+
+    path = model_path(model_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"학습된 모델이 없습니다: {path} (python train_rul.py 로 먼저 학습하세요)")
+    model = XGBRegressor()
+    model.load_model(path)
+    return model
+
+
+def load_metrics(model_dir=MODEL_DIR):
+    path = os.path.join(model_dir, METRICS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def replacement_estimate(predicted_rul, daily_usage):
+    """예측 RUL 과 하루 평균 사용 시간(초)으로 남은 일수와 연간 교체 비용 계산 (스칼라 / 배열 모두 가능).
+
+    RUL 이 0 이하면 이미 교체 시점이므로 남은 일수는 0, 연간 교체 비용은 정할 수 없어서 NaN.
+    """
+    rul = np.asarray(predicted_rul, dtype=np.float64)
+    remaining_days = np.clip(rul, 0, None) * CYCLE_DURATION / daily_usage
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annual_cost = np.where(remaining_days > 0, 365 / remaining_days * BATTERY_PRICE, np.nan)
+    if rul.ndim == 0:
+        return float(remaining_days), float(annual_cost)
+    return remaining_days, annual_cost
+
+
+class FastRULPredictor:
+    """XGBRegressor 를 DataFrame/DMatrix 변환 없이 빠르게 예측하는 래퍼.
+
+    mode="inplace"  : XGBoost inplace_predict (DMatrix 생성 생략)
+    mode="compiled" : 트리를 NumPy 배열로 펼쳐서 벡터화 탐색 (XGBoost 호출 없음)
+    두 방식 모두 float32 연산 순서를 XGBoost 와 맞춰서 결과가 동일함.
+    """
+
+    def __init__(self, model, mode="compiled", history=1000):
+        if mode not in ("inplace", "compiled"):
+            raise ValueError(f"지원하지 않는 mode 입니다: {mode}")
+        self.booster = model.get_booster() if hasattr(model, "get_booster") else model
+        self.mode = mode
+        self.n_features = len(RUL_FEATURES)
+        self.last_latency_ms = None
+        self._latencies = deque(maxlen=history)
+        self._compile()
+
+    # 🌲 트리 펼치기 -------------------------------------------------------
+    def _compile(self):
+        raw = json.loads(self.booster.save_raw(raw_format="json"))
+        learner = raw["learner"]
+        base_score = learner["learner_model_param"]["base_score"].strip("[]")
+        self.base_score = np.float32(float(base_score))
+
+        trees = learner["gradient_booster"]["model"]["trees"]
+        n_trees = len(trees)
+        n_nodes = max(len(t["left_children"]) for t in trees)
+
+        # 트리마다 노드 수가 달라서 (n_trees, n_nodes) 로 패딩
+        self._left = np.full((n_trees, n_nodes), -1, dtype=np.int32)
+        self._right = np.full((n_trees, n_nodes), -1, dtype=np.int32)
+        self._feature = np.zeros((n_trees, n_nodes), dtype=np.int32)
+        self._cond = np.zeros((n_trees, n_nodes), dtype=np.float32)
+        self._default_left = np.zeros((n_trees, n_nodes), dtype=bool)
+
+        depth = 0
+        for i, t in enumerate(trees):
+            n = len(t["left_children"])
+            self._left[i, :n] = t["left_children"]
+            self._right[i, :n] = t["right_children"]
+            self._feature[i, :n] = t["split_indices"]
+            # 리프 노드의 split_conditions 에는 리프 값이 저장되어 있음
+            self._cond[i, :n] = np.asarray(t["split_conditions"], dtype=np.float32)
+            self._default_left[i, :n] = np.asarray(t["default_left"], dtype=bool)
+            depth = max(depth, self._tree_depth(t))
+
+        # 리프에서는 자기 자신을 가리키게 해서 고정된 횟수만큼 반복해도 안전하게 함
+        is_leaf = self._left == -1
+        self._is_leaf = is_leaf
+        node_ids = np.broadcast_to(np.arange(n_nodes, dtype=np.int32), (n_trees, n_nodes))
+        self._left = np.where(is_leaf, node_ids, self._left)
+        self._right = np.where(is_leaf, node_ids, self._right)
+        self._tree_ids = np.arange(n_trees, dtype=np.int32)
+        self.n_trees = n_trees
+        self.max_depth = depth
+
+    @staticmethod
+    def _tree_depth(tree):
+        left, right = tree["left_children"], tree["right_children"]
+        depth, stack = 0, [(0, 0)]
+        while stack:
+            node, d = stack.pop()
+            if left[node] == -1:
+                depth = max(depth, d)
+                continue
+            stack.append((left[node], d + 1))
+            stack.append((right[node], d + 1))
+        return depth
+
+    def _predict_compiled(self, x):
+        n_rows = x.shape[0]
+        node = np.zeros((n_rows, self.n_trees), dtype=np.int32)
+        rows = np.arange(n_rows)[:, None]
+        trees = self._tree_ids[None, :]
+        for _ in range(self.max_depth):
+            feat = self._feature[trees, node]
+            value = x[rows, feat]
+            go_left = np.where(np.isnan(value), self._default_left[trees, node], value < self._cond[trees, node])
+            node = np.where(go_left, self._left[trees, node], self._right[trees, node])
+        leaves = self._cond[trees, node]
+
+        # XGBoost 와 같은 순서 (base_score + tree0 + tree1 + ...) 로 float32 누적
+        margin = np.empty((n_rows, self.n_trees + 1), dtype=np.float32)
+        margin[:, 0] = self.base_score
+        margin[:, 1:] = leaves
+        return np.cumsum(margin, axis=1, dtype=np.float32)[:, -1]
+
+    # 🔮 예측 ---------------------------------------------------------------
+    def _as_input(self, x):
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[1] != self.n_features:
+            raise ValueError(f"입력 컬럼 수는 {self.n_features}개여야 합니다: {RUL_FEATURES}")
+        return x
+
+    def predict(self, x):
+        x = self._as_input(x)
+        start = time.perf_counter()
+        if self.mode == "inplace":
+            pred = self.booster.inplace_predict(x)
+        else:
+            pred = self._predict_compiled(x)
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
+        self._latencies.append(self.last_latency_ms)
+        return pred
+
+    def predict_one(self, ambient_temperature, discharge_voltage, Rct, SOH):
+        x = np.array([ambient_temperature, discharge_voltage, Rct, SOH], dtype=np.float32)
+        return float(self.predict(x)[0])
+
+    # ⏱️ 지연 시간 ----------------------------------------------------------
+    def latency_stats(self):
+        if not self._latencies:
+            return {"count": 0, "last_ms": None, "p50_ms": None, "p99_ms": None, "mean_ms": None}
+        lat = np.fromiter(self._latencies, dtype=np.float64)
+        return {
+            "count": int(lat.size),
+            "last_ms": self.last_latency_ms,
+            "p50_ms": float(np.percentile(lat, 50)),
+            "p99_ms": float(np.percentile(lat, 99)),
+            "mean_ms": float(lat.mean()),
+        }
+
+    def check_against_booster(self, x):
+        """컴파일된 트리 결과와 XGBoost 결과의 최대 오차를 반환 (0 이면 동일)."""
+        x = self._as_input(x)
+        return float(np.max(np.abs(self._predict_compiled(x) - self.booster.inplace_predict(x))))
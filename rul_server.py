@@ -0,0 +1,186 @@
+"""로컬 RUL 추론 서버.
+
+train_rul.py 로 학습해 둔 모델을 한 번만 로드하고, 동시에 들어온 요청을 짧은 시간(window) 동안 모아서
+한 번에 예측(micro-batch)한다. 프로토콜은 줄 단위 JSON.
+
+    요청: {"features": [온도, 방전 종료 전압, Rct, SOH], "daily_usage": 36000}
+    응답: {"rul": ..., "remaining_days": ..., "annual_cost": ...}
+
+실행 예:
+    python rul_server.py --host 127.0.0.1 --port 8765
+    python rul_server.py --unix /tmp/rul.sock
+"""
+import argparse
+import asyncio
+import json
+import socket
+
+import numpy as np
+
+from rul_predictor import MODEL_DIR, FastRULPredictor, RUL_FEATURES, load_model, replacement_estimate
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_DAILY_USAGE = 36000
+
+
+class MicroBatcher:
+    """요청을 큐에 모았다가 window_ms 안에 들어온 것들을 한 번에 예측."""
+
+    def __init__(self, predictor, window_ms=2.0, max_batch=256):
+        self.predictor = predictor
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, features):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((features, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(items) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                batch = np.asarray([f for f, _ in items], dtype=np.float32)
+                preds = self.predictor.predict(batch)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(items)
+            for (_, future), pred in zip(items, preds):
+                if not future.done():
+                    future.set_result(float(pred))
+
+
+async def handle_client(batcher, reader, writer):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                req = json.loads(line)
+                if not isinstance(req, dict):
+                    raise ValueError("요청은 JSON 객체여야 합니다.")
+                if req.get("stats"):
+                    resp = {
+                        "batches": batcher.batches,
+                        "requests": batcher.requests,
+                        "latency": batcher.predictor.latency_stats(),
+                    }
+                else:
+                    if not isinstance(req.get("features"), list):
+                        raise ValueError(f"features 는 {RUL_FEATURES} 순서의 값 목록이어야 합니다.")
+                    features = [float(v) for v in req["features"]]
+                    if len(features) != len(RUL_FEATURES):
+                        raise ValueError(f"features 는 {RUL_FEATURES} 순서의 {len(RUL_FEATURES)}개 값이어야 합니다.")
+                    daily_usage = float(req.get("daily_usage", DEFAULT_DAILY_USAGE))
+                    if daily_usage <= 0:
+                        raise ValueError("daily_usage 는 0보다 커야 합니다.")
+                    rul = await batcher.submit(features)
+                    remaining_days, annual_cost = replacement_estimate(rul, daily_usage)
+                    # RUL 이 0 이하면 연간 비용은 NaN -> JSON 에서는 null
+                    resp = {"rul": rul, "remaining_days": remaining_days,
+                            "annual_cost": None if np.isnan(annual_cost) else annual_cost}
+            except (ValueError, KeyError, TypeError, ZeroDivisionError) as e:
+                resp = {"error": str(e)}
+            writer.write((json.dumps(resp) + "\n").encode())
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, window_ms=2.0, max_batch=256,
+                model=None, model_dir=MODEL_DIR):
+    if model is None:
+        model = load_model(model_dir)
+    batcher = MicroBatcher(FastRULPredictor(model), window_ms=window_ms, max_batch=max_batch)
+    batch_task = asyncio.create_task(batcher.run())
+
+    def on_connect(reader, writer):
+        return handle_client(batcher, reader, writer)
+
+    if unix_path:
+        server = await asyncio.start_unix_server(on_connect, path=unix_path)
+        print(f"🚀 RUL 추론 서버 실행 중: unix:{unix_path}")
+    else:
+        server = await asyncio.start_server(on_connect, host, port)
+        print(f"🚀 RUL 추론 서버 실행 중: {host}:{port}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_task.cancel()
+
+
+class RULClient:
+    """Streamlit 스크립트 스레드에서 쓰는 동기 클라이언트.
+
+    address 는 "127.0.0.1:8765" 또는 "unix:/tmp/rul.sock" 형식.
+    """
+
+    def __init__(self, address=f"{DEFAULT_HOST}:{DEFAULT_PORT}", timeout=5.0):
+        self.address = address
+        self.timeout = timeout
+
+    def _connect(self):
+        if self.address.startswith("unix:"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address[len("unix:"):])
+            return sock
+        host, port = self.address.rsplit(":", 1)
+        return socket.create_connection((host, int(port)), timeout=self.timeout)
+
+    def _request(self, payload):
+        with self._connect() as sock, sock.makefile("rwb") as f:
+            f.write((json.dumps(payload) + "\n").encode())
+            f.flush()
+            line = f.readline()
+        if not line:
+            raise ConnectionError("서버 응답이 없습니다.")
+        resp = json.loads(line)
+        if "error" in resp:
+            raise ValueError(resp["error"])
+        return resp
+
+    def predict(self, features, daily_usage=DEFAULT_DAILY_USAGE):
+        return self._request({"features": [float(v) for v in features], "daily_usage": daily_usage})
+
+    def stats(self):
+        return self._request({"stats": True})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 RUL 추론 서버 (micro-batching)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="Unix 소켓 경로 (지정 시 host/port 대신 사용)")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="배치를 모으는 시간 (ms)")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--model-dir", default=MODEL_DIR, help="train_rul.py 로 저장한 모델 폴더")
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.unix, args.window_ms, args.max_batch, model_dir=args.model_dir))
+
+
+if __name__ == "__main__":
+    main()
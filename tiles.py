@@ -0,0 +1,133 @@
+"""모니터링 (2) 자유 X/Y 탐색용 다해상도 집계(pyramid) 타일.
+
+X 컬럼 기준으로 배터리별 정렬한 뒤, 숫자 컬럼 전체에 대해
+    level 0 : 원본 행 그대로 (최대 확대 시 정확한 데이터, 복사본을 따로 만들지 않음)
+    level k : factor**k 행씩 묶은 버킷의 x 범위와 y 의 min / max / mean (float32)
+을 미리 만들어 둔다. 화면에 보이는 X 범위에 들어오는 버킷 수가 max_points 이하가 되는
+가장 세밀한 level 을 골라서 그리므로, 파일 크기와 관계없이 그리는 점 수가 일정하다.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FACTOR = 8
+DEFAULT_MAX_POINTS = 2000
+
+
+def _bucket_starts(seg_starts, seg_lens, size):
+    """배터리 구간마다 size 개씩 자른 버킷의 시작 위치와 버킷이 속한 배터리 번호."""
+    n_buckets = -(-seg_lens // size)
+    seg_no = np.repeat(np.arange(len(seg_starts)), n_buckets)
+    first = np.repeat(np.cumsum(n_buckets) - n_buckets, n_buckets)
+    offset = np.arange(n_buckets.sum()) - first
+    return np.repeat(seg_starts, n_buckets) + offset * size, seg_no, n_buckets
+
+
+class TilePyramid:
+    """한 파일 + 한 X 컬럼에 대한 배터리별 min/max/mean 피라미드."""
+
+    def __init__(self, df, x_col, battery_col="battery_id", factor=DEFAULT_FACTOR):
+        self.x_col = x_col
+        self.factor = factor
+        self.columns = [c for c in df.select_dtypes(include="number").columns if c != x_col]
+
+        codes, batteries = pd.factorize(df[battery_col], sort=False)
+        x = pd.to_numeric(df[x_col], errors="coerce").to_numpy(dtype=np.float64)
+        keep = (codes >= 0) & ~np.isnan(x)
+        order = np.lexsort((x[keep], codes[keep]))
+
+        codes = codes[keep][order]
+        self.batteries = {b: i for i, b in enumerate(batteries)}
+        x = x[keep][order]
+        y = df.loc[keep, self.columns].to_numpy(dtype=np.float64)[order]
+
+        seg_lens = np.bincount(codes, minlength=len(batteries))
+        seg_starts = np.concatenate(([0], np.cumsum(seg_lens)[:-1]))
+
+        # level 0 은 원본 (x_lo == x_hi, min == max == mean) 이라 y 하나만 둠
+        level = {"seg_starts": seg_starts, "seg_lens": seg_lens, "x_lo": x, "x_hi": x, "x_mean": x, "y": y}
+        self.levels = [level]
+        while level["seg_lens"].max(initial=0) > 1:
+            level = self._coarsen(level)
+            self.levels.append(level)
+
+    def _coarsen(self, prev):
+        starts, seg_no, n_buckets = _bucket_starts(prev["seg_starts"], prev["seg_lens"], self.factor)
+        if len(starts) == 0:
+            return prev
+        if "y" in prev:
+            # 첫 집계 level 은 원본 y 에서 바로 만듦 (level 0 에 합계/개수 배열을 따로 두지 않음)
+            y = prev["y"]
+            rows = np.diff(np.append(starts, len(y)))
+            y_min = np.fmin.reduceat(y, starts, axis=0)
+            y_max = np.fmax.reduceat(y, starts, axis=0)
+            y_sum = np.add.reduceat(np.nan_to_num(y), starts, axis=0)
+            y_count = np.add.reduceat(~np.isnan(y), starts, axis=0, dtype=np.int32)
+        else:
+            rows = np.add.reduceat(prev["rows"], starts)
+            y_min = np.fmin.reduceat(prev["y_min"], starts, axis=0)
+            y_max = np.fmax.reduceat(prev["y_max"], starts, axis=0)
+            y_sum = np.add.reduceat(prev["y_sum"], starts, axis=0)
+            y_count = np.add.reduceat(prev["y_count"], starts, axis=0)
+        return {
+            "seg_starts": np.concatenate(([0], np.cumsum(n_buckets)[:-1])),
+            "seg_lens": n_buckets,
+            "x_lo": np.minimum.reduceat(prev["x_lo"], starts),
+            "x_hi": np.maximum.reduceat(prev["x_hi"], starts),
+            "x_mean": np.add.reduceat(prev["x_mean"] * prev.get("rows", 1), starts) / rows,
+            "y_min": y_min.astype(np.float32, copy=False),
+            "y_max": y_max.astype(np.float32, copy=False),
+            "y_sum": y_sum.astype(np.float32, copy=False),
+            "y_count": y_count.astype(np.float32, copy=False),
+            "rows": rows,
+        }
+
+    def x_range(self, battery):
+        level = self.levels[0]
+        b = self.batteries[battery]
+        s, n = level["seg_starts"][b], level["seg_lens"][b]
+        if n == 0:
+            return None
+        return float(level["x_lo"][s]), float(level["x_hi"][s + n - 1])
+
+    def query(self, battery, y_col, x_min=None, x_max=None, max_points=DEFAULT_MAX_POINTS):
+        """보이는 X 범위에 맞는 level 의 버킷을 반환.
+
+        반환값: dict(level, rows_per_bucket, x, y_min, y_max, y_mean) — level 0 이면 원본 데이터.
+        """
+        b = self.batteries[battery]
+        j = self.columns.index(y_col)
+
+        base = self.levels[0]
+        s, n = base["seg_starts"][b], base["seg_lens"][b]
+        xs = base["x_lo"][s:s + n]
+        lo = 0 if x_min is None else np.searchsorted(xs, x_min, side="left")
+        hi = n if x_max is None else np.searchsorted(xs, x_max, side="right")
+        visible = max(hi - lo, 1)
+
+        k = 0 if visible <= max_points else math.ceil(math.log(visible / max_points, self.factor))
+        k = min(k, len(self.levels) - 1)
+        level = self.levels[k]
+
+        s, n = level["seg_starts"][b], level["seg_lens"][b]
+        # 버킷은 x 순서로 정렬되어 있으므로 겹치는 구간만 이진 탐색으로 자름
+        lo = 0 if x_min is None else np.searchsorted(level["x_hi"][s:s + n], x_min, side="left")
+        hi = n if x_max is None else np.searchsorted(level["x_lo"][s:s + n], x_max, side="right")
+        sl = slice(s + lo, s + hi)
+
+        if k == 0:
+            y = level["y"][sl, j]
+            return {"level": 0, "rows_per_bucket": 1, "x": level["x_mean"][sl], "y_min": y, "y_max": y, "y_mean": y}
+
+        count = level["y_count"][sl, j]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            y_mean = np.where(count > 0, level["y_sum"][sl, j] / count, np.nan)
+        return {
+            "level": k,
+            "rows_per_bucket": self.factor ** k,
+            "x": level["x_mean"][sl],
+            "y_min": level["y_min"][sl, j],
+            "y_max": level["y_max"][sl, j],
+            "y_mean": y_mean,
+        }
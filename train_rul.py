@@ -0,0 +1,183 @@
+"""RUL 모델 오프라인 학습 스크립트.
+
+battery_id 기준 GroupKFold 로 같은 배터리의 싸이클이 train/test 에 섞이지 않게 하고,
+하이퍼파라미터 후보 x fold 조합을 joblib 으로 여러 코어에 나눠서 학습한다.
+가장 좋은 조합으로 전체 데이터를 다시 학습해서 model/ 폴더에 저장하면
+대시보드와 추론 서버는 그 모델을 불러와서 쓰기만 한다.
+
+실행 예:
+    python train_rul.py
+    python train_rul.py --data "Merged_Dataset_re (1).csv" --model-dir model --n-jobs -1
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import GroupKFold, GroupShuffleSplit, ShuffleSplit
+from xgboost import XGBRegressor
+
+from features import load_features
+from rul_predictor import DATA_PATH, MODEL_DIR, MODEL_FILE, METRICS_FILE, RUL_FEATURES
+
+# 하이퍼파라미터 탐색 범위
+PARAM_GRID = {
+    "max_depth": [3, 4, 6],
+    "learning_rate": [0.05, 0.1, 0.3],
+    "min_child_weight": [1, 5],
+    "subsample": [0.8, 1.0],
+}
+MAX_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 50
+N_SPLITS = 5
+INNER_VALID_SIZE = 0.2  # early stopping 용으로 train fold 에서 떼어낼 배터리 비율
+RESIDUAL_QUANTILES = (0.1, 0.5, 0.9)  # RUL 예측 구간용 out-of-fold 잔차 분위수
+
+
+def load_training_data(data_path=DATA_PATH):
+    # 원본 CSV 대신 feature store 캐시(Parquet)에서 읽음
+    df = load_features(data_path)
+    df = df.dropna(subset=RUL_FEATURES + ["RUL"])
+    X = df[RUL_FEATURES].to_numpy(dtype=np.float32)
+    y = df["RUL"].to_numpy(dtype=np.float32)
+    groups = df["battery_id"].to_numpy()
+    return X, y, groups
+
+
+def param_candidates(grid=PARAM_GRID):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def _make_model(params, n_estimators, early_stopping_rounds=None, random_state=42):
+    # 병렬화는 joblib 이 담당하므로 모델 하나는 스레드 1개만 사용
+    return XGBRegressor(
+        tree_method="hist",
+        n_estimators=n_estimators,
+        early_stopping_rounds=early_stopping_rounds,
+        random_state=random_state,
+        n_jobs=1,
+        **params,
+    )
+
+
+def _early_stopping_split(train_idx, groups, random_state=42):
+    """early stopping 용 검증 세트를 train fold 안에서만 배터리 단위로 떼어냄 (test fold 는 보지 않음)."""
+    train_groups = groups[train_idx]
+    if len(np.unique(train_groups)) < 2:
+        splitter = ShuffleSplit(n_splits=1, test_size=INNER_VALID_SIZE, random_state=random_state)
+        fit_pos, valid_pos = next(splitter.split(train_idx))
+    else:
+        splitter = GroupShuffleSplit(n_splits=1, test_size=INNER_VALID_SIZE, random_state=random_state)
+        fit_pos, valid_pos = next(splitter.split(train_idx, groups=train_groups))
+    return train_idx[fit_pos], train_idx[valid_pos]
+
+
+def fit_fold(params, X, y, groups, train_idx, test_idx):
+    """후보 하나를 fold 하나에서 학습하고 검증 점수를 반환."""
+    fit_idx, valid_idx = _early_stopping_split(train_idx, groups)
+    model = _make_model(params, MAX_ESTIMATORS, EARLY_STOPPING_ROUNDS)
+    model.fit(X[fit_idx], y[fit_idx], eval_set=[(X[valid_idx], y[valid_idx])], verbose=False)
+    # 트리 수는 train fold 안의 검증 세트로 정하고, test fold 전체로 점수만 매김
+    pred = model.predict(X[test_idx], iteration_range=(0, model.best_iteration + 1))
+    err = pred - y[test_idx]
+    return {
+        "rmse": float(np.sqrt(np.mean(err ** 2))),
+        "mae": float(np.mean(np.abs(err))),
+        "best_iteration": int(model.best_iteration),
+        "test_idx": test_idx,
+        "pred": pred,
+    }
+
+
+def search(X, y, groups, candidates, n_splits=N_SPLITS, n_jobs=-1):
+    n_splits = min(n_splits, len(np.unique(groups)))
+    folds = list(GroupKFold(n_splits=n_splits).split(X, y, groups))
+
+    # (후보, fold) 조합 전체를 한 번에 병렬 실행
+    jobs = [(ci, fi) for ci in range(len(candidates)) for fi in range(len(folds))]
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(fit_fold)(candidates[ci], X, y, groups, *folds[fi]) for ci, fi in jobs
+    )
+
+    results = []
+    for ci, params in enumerate(candidates):
+        fold_scores = [s for (c, _), s in zip(jobs, scores) if c == ci]
+        # 모든 행을 자신이 test 였던 fold 의 모델로 예측한 out-of-fold 예측값으로 잔차 분위수 계산
+        oof = np.full(len(y), np.nan)
+        for s in fold_scores:
+            oof[s.pop("test_idx")] = s.pop("pred")
+        residuals = y - oof
+        rmse = np.array([s["rmse"] for s in fold_scores])
+        mae = np.array([s["mae"] for s in fold_scores])
+        results.append({
+            "params": params,
+            "rmse_mean": float(rmse.mean()),
+            "rmse_std": float(rmse.std()),
+            "mae_mean": float(mae.mean()),
+            "n_estimators": int(np.mean([s["best_iteration"] for s in fold_scores])) + 1,
+            "residual_quantiles": {
+                str(q): float(v) for q, v in zip(RESIDUAL_QUANTILES, np.quantile(residuals, RESIDUAL_QUANTILES))
+            },
+            "folds": fold_scores,
+        })
+    results.sort(key=lambda r: r["rmse_mean"])
+    return results, n_splits
+
+
+def train(data_path=DATA_PATH, model_dir=MODEL_DIR, n_splits=N_SPLITS, n_jobs=-1):
+    start = time.perf_counter()
+    X, y, groups = load_training_data(data_path)
+    candidates = param_candidates()
+    results, n_splits = search(X, y, groups, candidates, n_splits=n_splits, n_jobs=n_jobs)
+    best = results[0]
+
+    # 가장 좋은 조합으로 전체 데이터 재학습 (트리 수는 fold 안 early stopping 으로 정한 best_iteration 평균)
+    model = _make_model(best["params"], best["n_estimators"])
+    model.set_params(n_jobs=n_jobs)
+    model.fit(X, y)
+
+    os.makedirs(model_dir, exist_ok=True)
+    model.save_model(os.path.join(model_dir, MODEL_FILE))
+
+    report = {
+        "data_path": data_path,
+        "features": RUL_FEATURES,
+        "n_rows": int(len(y)),
+        "n_batteries": int(len(np.unique(groups))),
+        "cv": f"GroupKFold(n_splits={n_splits}) by battery_id",
+        "early_stopping": f"GroupShuffleSplit(test_size={INNER_VALID_SIZE}) by battery_id inside each train fold",
+        "best_params": best["params"],
+        "n_estimators": best["n_estimators"],
+        "cv_rmse_mean": best["rmse_mean"],
+        "cv_rmse_std": best["rmse_std"],
+        "cv_mae_mean": best["mae_mean"],
+        "residual_quantiles": best["residual_quantiles"],
+        "train_seconds": round(time.perf_counter() - start, 2),
+        "candidates": results,
+    }
+    with open(os.path.join(model_dir, METRICS_FILE), "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return model, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RUL 모델 GroupKFold 교차검증 + 하이퍼파라미터 탐색")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--n-splits", type=int, default=N_SPLITS)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="사용할 코어 수 (-1: 전체)")
+    args = parser.parse_args()
+
+    _, report = train(args.data, args.model_dir, args.n_splits, args.n_jobs)
+    print(f"✅ 학습 완료 ({report['train_seconds']}초)")
+    print(f"   best params : {report['best_params']} / n_estimators={report['n_estimators']}")
+    print(f"   CV RMSE     : {report['cv_rmse_mean']:.3f} ± {report['cv_rmse_std']:.3f}")
+    print(f"   저장 위치   : {args.model_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""EOL / RUL 불확실성 구간 계산.
+
+기업용 페이지의 SARIMAX(0,1,0)x(0,1,0,5) 는 추정할 계수가 없는 차분 모델이라
+    (1 - B)(1 - B^5) y_t = e_t
+로 쓸 수 있다. 그래서 재학습 없이
+    1) 차분한 SOH 시계열의 잔차 e_t 를 복원추출(residual bootstrap)하고
+    2) 모델의 충격반응 계수(psi_j = j // 5 + 1)로 만든 상삼각 행렬과 한 번 곱해서
+수천 개의 예측 경로를 한 번에 만든다. 경로마다 임계값(최대 SOH 의 80%)을 처음
+넘는 싸이클이 그 경로의 EOL 이고, 그 분포의 분위수를 구간으로 쓴다.
+"""
+import numpy as np
+import pandas as pd
+
+SEASON = 5
+MAX_CYCLE = 100  # 기업용 페이지와 같이 100 싸이클까지만 예측
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+DEFAULT_PATHS = 2000
+
+
+def _point_forecast(y, horizon):
+    """(1-B)(1-B^5) 모델의 점 예측: 마지막 계절 차분이 그대로 유지된다고 보고 이어 붙임."""
+    last_season = y[-SEASON:]
+    seasonal_diff = y[-1] - y[-1 - SEASON]
+    h = np.arange(1, horizon + 1)
+    return last_season[(h - 1) % SEASON] + ((h - 1) // SEASON + 1) * seasonal_diff
+
+
+def _impulse_matrix(horizon):
+    """경로 편차 = 잔차 @ M 이 되도록 하는 (horizon, horizon) 상삼각 Toeplitz 행렬."""
+    lag = np.arange(horizon)[None, :] - np.arange(horizon)[:, None]
+    return np.where(lag >= 0, lag // SEASON + 1, 0).astype(np.float64)
+
+
+def simulate_soh_paths(soh, horizon, n_paths=DEFAULT_PATHS, rng=None):
+    """SOH 시계열 뒤로 horizon 싸이클 만큼의 예측 경로 (n_paths, horizon) 를 반환."""
+    rng = np.random.default_rng(rng)
+    y = np.asarray(soh, dtype=np.float64)
+    residuals = np.diff(y[SEASON:] - y[:-SEASON])
+    residuals = residuals - residuals.mean()
+    draws = rng.choice(residuals, size=(n_paths, horizon), replace=True)
+    return _point_forecast(y, horizon)[None, :] + draws @ _impulse_matrix(horizon)
+
+
+def first_crossing(paths, threshold):
+    """경로마다 threshold 이하로 처음 내려가는 위치 (없으면 -1)."""
+    below = paths <= threshold
+    idx = below.argmax(axis=1)
+    return np.where(below.any(axis=1), idx, -1)
+
+
+def eol_quantiles(soh, quantiles=DEFAULT_QUANTILES, max_cycle=MAX_CYCLE, n_paths=DEFAULT_PATHS, seed=42):
+    """한 배터리의 SOH 시계열(index=Cycle)로 EOL 분위수를 계산.
+
+    max_cycle 까지 임계값을 넘지 않는 경로는 EOL=inf 로 두므로,
+    그런 경로가 많으면 위쪽 분위수가 inf 가 된다.
+    """
+    soh = soh.dropna()
+    threshold = soh.max() * 0.8
+    last_cycle = int(soh.index[-1])
+    horizon = max_cycle - last_cycle
+
+    if last_cycle >= max_cycle or horizon <= 0 or len(soh) < SEASON + 2:
+        return None
+
+    paths = simulate_soh_paths(soh.to_numpy(), horizon, n_paths=n_paths, rng=seed)
+    idx = first_crossing(paths, threshold)
+    eol = np.where(idx >= 0, last_cycle + 1 + idx, np.inf)
+    return np.quantile(eol, quantiles, method="inverted_cdf")
+
+
+def fleet_eol_intervals(df, quantiles=DEFAULT_QUANTILES, max_cycle=MAX_CYCLE, n_paths=DEFAULT_PATHS, seed=42):
+    """배터리별 EOL 분위수 표 (예측이 필요 없는 배터리는 빠짐)."""
+    rows = []
+    for battery, battery_df in df.groupby("battery_id", sort=False):
+        if "SOH" not in battery_df.columns:
+            continue
+        soh = battery_df.set_index("Cycle")["SOH"]
+        if soh.isna().all():
+            continue
+        q = eol_quantiles(soh, quantiles, max_cycle, n_paths, seed)
+        if q is None:
+            continue
+        row = {"battery_id": battery}
+        row.update({f"EOL_p{int(round(p * 100))}": v for p, v in zip(quantiles, q)})
+        rows.append(row)
+    q_columns = [f"EOL_p{int(round(p * 100))}" for p in quantiles]
+    return pd.DataFrame(rows, columns=["battery_id"] + q_columns).astype({c: float for c in q_columns})
+
+
+def rul_quantiles(predicted_rul, residual_quantiles):
+    """교차검증 out-of-fold 잔차 분위수(metrics.json)를 점 예측에 더해서 RUL 분위수를 만듦."""
+    pred = np.asarray(predicted_rul, dtype=np.float64)
+    return {q: pred + float(r) for q, r in residual_quantiles.items()}